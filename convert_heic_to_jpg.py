@@ -5,21 +5,76 @@ Renames files to good1.jpg, good2.jpg, bad1.jpg, etc.
 Deletes original HEIC files after conversion
 """
 
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import re
 
 try:
-    from pillow_heif import register_heif_opener
-    from PIL import Image
-    register_heif_opener()
+    import pillow_heif
+    import numpy as np
+    import simplejpeg
 except ImportError:
     print("Required packages not installed. Installing now...")
     import subprocess
-    subprocess.check_call(['pip', 'install', 'pillow-heif', 'Pillow'])
-    from pillow_heif import register_heif_opener
-    from PIL import Image
-    register_heif_opener()
+    subprocess.check_call(['pip', 'install', 'pillow-heif', 'numpy', 'simplejpeg'])
+    import pillow_heif
+    import numpy as np
+    import simplejpeg
+
+
+# Compiled once - pulls the sequence number out of an already-renamed file
+_NUM = re.compile(r'\d+')
+
+
+def _list_files(directory, suffix):
+    """
+    List files in a directory with the given extension (case-insensitive).
+    One scandir pass instead of two globs, which matters on OneDrive-synced
+    folders where every extra directory walk can trigger hydration stats.
+    """
+    suffix = suffix.lower()
+    with os.scandir(directory) as it:
+        return [Path(e.path) for e in it
+                if e.is_file() and e.name.lower().endswith(suffix)]
+
+
+def _convert_one(heic_path, jpg_path, delete_original):
+    """
+    Convert a single HEIC file to JPG (runs in a worker process).
+    Returns None on success, or the error message on failure.
+    """
+    try:
+        print(f"Converting: {heic_path.name} -> {jpg_path.name}")
+        # Read the whole file in one sequential pass so kernel readahead
+        # keeps the SSD busy, then decode from memory - libde265 never
+        # stalls mid-decode on small buffered reads. Reads in one worker
+        # overlap decode in the others.
+        data = heic_path.read_bytes()
+
+        # Decode straight to a pixel buffer - no PIL Image object and no
+        # mode-conversion copy in between
+        heif = pillow_heif.open_heif(io.BytesIO(data), convert_hdr_to_8bit=True)
+        arr = np.asarray(heif)
+        # Drop the alpha plane if present - simplejpeg wants straight RGB
+        if arr.shape[2] == 4:
+            arr = arr[..., :3]
+        # simplejpeg needs C-contiguous input, and libheif often pads the
+        # row stride, so compact unconditionally (no-op when already tight)
+        arr = np.ascontiguousarray(arr)
+
+        # Encode with simplejpeg (libjpeg-turbo) - fastdct uses the integer
+        # fast-DCT path, roughly 2x quicker than Pillow's save
+        buf = simplejpeg.encode_jpeg(arr, quality=95,
+                                     colorspace='RGB', fastdct=True)
+        jpg_path.write_bytes(buf)
+
+        if delete_original:
+            heic_path.unlink()
+        return None
+    except Exception as e:
+        return str(e)
 
 
 def rename_jpg_files(source_dir):
@@ -39,20 +94,21 @@ def rename_jpg_files(source_dir):
         print(f"Processing {class_name} folder...")
         print(f"{'='*50}")
         
-        # Get all jpg files - use set to remove duplicates from OneDrive sync
-        all_jpgs = set(class_dir.glob("*.jpg")) | set(class_dir.glob("*.JPG"))
+        # Get all jpg files - a single scandir pass can't double-count the
+        # way the old pair of case-sensitive globs could on OneDrive sync
+        all_jpgs = _list_files(class_dir, '.jpg')
         
         # Separate already-renamed files from IMG_* files
         already_renamed = []
         to_rename = []
         
-        pattern = re.compile(rf"^{class_name.lower()}\d+\.jpg$", re.IGNORECASE)
-        
+        pattern = re.compile(rf"^{class_name.lower()}(\d+)\.jpg$", re.IGNORECASE)
+
         for jpg in all_jpgs:
-            if pattern.match(jpg.name):
-                # Extract number from filename
-                num = int(re.search(r'\d+', jpg.name).group())
-                already_renamed.append((num, jpg))
+            m = pattern.match(jpg.name)
+            if m:
+                # Number is captured by the match - no second regex scan
+                already_renamed.append((int(m.group(1)), jpg))
             else:
                 to_rename.append(jpg)
         
@@ -68,30 +124,35 @@ def rename_jpg_files(source_dir):
         else:
             max_num = 0
         
-        # Rename remaining files
+        # Names already in the folder - membership checks replace the
+        # per-file exists() stat calls, which can block on OneDrive hydration
+        existing_names = {p.name for p in all_jpgs}
+
+        # Rename remaining files - rename directly and let the error tell us
+        # about races instead of stat-ing first
         for jpg in sorted(to_rename):
-            # Check if file still exists (OneDrive sync can cause issues)
-            if not jpg.exists():
-                print(f"  Skipping (already moved): {jpg.name}")
-                continue
-                
             max_num += 1
             new_name = f"{class_name.lower()}{max_num}.jpg"
-            new_path = class_dir / new_name
-            
+
             # Skip if target already exists
-            if new_path.exists():
+            if new_name in existing_names:
                 print(f"  Skipping (target exists): {new_name}")
                 continue
-            
+
             try:
                 print(f"  Renaming: {jpg.name} -> {new_name}")
-                jpg.rename(new_path)
-            except Exception as e:
+                os.rename(jpg, class_dir / new_name)
+                existing_names.add(new_name)
+            except FileNotFoundError:
+                print(f"  Skipping (already moved): {jpg.name}")
+            except FileExistsError:
+                print(f"  Skipping (target exists): {new_name}")
+            except OSError as e:
                 print(f"  Error renaming {jpg.name}: {e}")
         
         # Count final files
-        final_count = len(list(class_dir.glob(f"{class_name.lower()}*.jpg")))
+        final_count = sum(1 for f in _list_files(class_dir, '.jpg')
+                          if pattern.match(f.name))
         print(f"  Final count: {final_count} files")
 
 
@@ -117,8 +178,9 @@ def convert_and_rename_heic_to_jpg(source_dir, delete_originals=True):
         print(f"Processing {class_name} folder...")
         print(f"{'='*50}")
         
-        # Find all HEIC files in this class folder
-        heic_files = sorted(list(class_dir.glob("*.HEIC")) + list(class_dir.glob("*.heic")))
+        # Find all HEIC files in this class folder - one scandir pass
+        # instead of a glob per extension casing
+        heic_files = sorted(_list_files(class_dir, '.heic'))
         
         if not heic_files:
             print(f"No HEIC files found in {class_name}")
@@ -127,34 +189,40 @@ def convert_and_rename_heic_to_jpg(source_dir, delete_originals=True):
         print(f"Found {len(heic_files)} HEIC files")
         
         # Find existing renamed files to get starting number
-        existing = list(class_dir.glob(f"{class_name.lower()}*.jpg"))
+        existing = [f for f in _list_files(class_dir, '.jpg')
+                    if f.name.lower().startswith(class_name.lower())]
         if existing:
-            nums = [int(re.search(r'\d+', f.name).group()) for f in existing if re.search(r'\d+', f.name)]
+            matches = (_NUM.search(f.name) for f in existing)
+            nums = [int(m.group()) for m in matches if m]
             next_num = max(nums) + 1 if nums else 1
         else:
             next_num = 1
         
-        # Convert and rename
+        # Assign target names up front, then convert in parallel - HEVC
+        # decode is single-threaded per image but independent across images
+        jobs = []
         for heic_file in heic_files:
             new_name = f"{class_name.lower()}{next_num}.jpg"
-            jpg_path = class_dir / new_name
-            
-            try:
-                print(f"Converting: {heic_file.name} -> {new_name}")
-                img = Image.open(heic_file)
-                img = img.convert('RGB')
-                img.save(jpg_path, 'JPEG', quality=95)
-                total_converted += 1
-                next_num += 1
-                
-                # Delete original HEIC file
-                if delete_originals:
-                    heic_file.unlink()
-                    total_deleted += 1
-                    
-            except Exception as e:
-                print(f"Error converting {heic_file.name}: {e}")
-                total_errors += 1
+            jobs.append((heic_file, class_dir / new_name))
+            next_num += 1
+
+        # chunksize amortizes the IPC cost of shipping paths to workers
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            errors = executor.map(
+                _convert_one,
+                [heic for heic, _ in jobs],
+                [jpg for _, jpg in jobs],
+                [delete_originals] * len(jobs),
+                chunksize=4
+            )
+            for (heic_file, _), error in zip(jobs, errors):
+                if error is None:
+                    total_converted += 1
+                    if delete_originals:
+                        total_deleted += 1
+                else:
+                    print(f"Error converting {heic_file.name}: {error}")
+                    total_errors += 1
     
     print(f"\n{'='*50}")
     print("CONVERSION SUMMARY")
@@ -2,58 +2,78 @@
 Quick image viewer to check training images
 """
 import cv2 as cv
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def view_images(folder_path, max_images=5):
-    """View images from a folder, properly resized to fit screen"""
+
+def _load_image(img_path):
+    """Decode a JPG from its raw bytes (libjpeg releases the GIL)"""
+    data = np.frombuffer(img_path.read_bytes(), np.uint8)
+    return cv.imdecode(data, cv.IMREAD_COLOR)
+
+
+def view_images(folder_path, max_images=5, tile_height=400, columns=3):
+    """
+    View images from a folder as a single montage window.
+    Returns False if 'q' was pressed (caller should stop), True otherwise.
+    """
     folder = Path(folder_path)
     jpg_files = sorted(list(folder.glob("*.jpg")))[:max_images]
-    
+
     print(f"Viewing {len(jpg_files)} images from {folder.name}")
     print("Press any key to continue, 'q' to quit")
-    
-    for img_path in jpg_files:
-        img = cv.imread(str(img_path))
+
+    if not jpg_files:
+        return True
+
+    # Decode in parallel - JPEG decode releases the GIL, so this scales
+    # across cores instead of reading one file at a time
+    with ThreadPoolExecutor() as executor:
+        imgs = list(executor.map(_load_image, jpg_files))
+
+    # Scale every image to a common tile height
+    tiles = []
+    for img_path, img in zip(jpg_files, imgs):
         if img is None:
             print(f"Could not load: {img_path.name}")
             continue
-        
-        # Get original dimensions
         h, w = img.shape[:2]
-        print(f"\n{img_path.name}: Original size {w}x{h}")
-        
-        # Resize to fit screen (max 800 height)
-        max_height = 800
-        if h > max_height:
-            scale = max_height / h
-            new_w = int(w * scale)
-            new_h = int(h * scale)
-            img_resized = cv.resize(img, (new_w, new_h))
-        else:
-            img_resized = img
-        
-        cv.imshow(f"{folder.name} - {img_path.name}", img_resized)
-        key = cv.waitKey(0)
-        cv.destroyAllWindows()
-        
-        if key == ord('q'):
-            break
+        print(f"{img_path.name}: Original size {w}x{h}")
+        scale = tile_height / h
+        tiles.append(cv.resize(img, (int(w * scale), tile_height)))
+
+    if not tiles:
+        return True
+
+    # Pad tiles to a common width so rows stack cleanly
+    tile_width = max(t.shape[1] for t in tiles)
+    tiles = [cv.copyMakeBorder(t, 0, 0, 0, tile_width - t.shape[1],
+                               cv.BORDER_CONSTANT, value=0) for t in tiles]
+
+    # Fill out the last row with blanks, then build the grid
+    blank = np.zeros_like(tiles[0])
+    while len(tiles) % columns:
+        tiles.append(blank)
+    rows = [np.hstack(tiles[i:i + columns])
+            for i in range(0, len(tiles), columns)]
+    grid = np.vstack(rows)
+
+    # One window and one key press per folder instead of one per image
+    cv.imshow(f"{folder.name} ({len(jpg_files)} images)", grid)
+    key = cv.waitKey(0)
+    cv.destroyAllWindows()
+
+    return key != ord('q')
 
 
 if __name__ == "__main__":
     base_dir = Path(__file__).parent / "Training_Data"
-    
-    print("="*50)
-    print("VIEWING GOOD IMAGES")
-    print("="*50)
-    view_images(base_dir / "Good", max_images=3)
-    
-    print("\n" + "="*50)
-    print("VIEWING BAD IMAGES")
-    print("="*50)
-    view_images(base_dir / "Bad", max_images=3)
-    
-    print("\n" + "="*50)
-    print("VIEWING UGLY IMAGES")
-    print("="*50)
-    view_images(base_dir / "Ugly", max_images=3)
+
+    for class_name in ["Good", "Bad", "Ugly"]:
+        print("="*50)
+        print(f"VIEWING {class_name.upper()} IMAGES")
+        print("="*50)
+        if not view_images(base_dir / class_name, max_images=3):
+            break
+        print()